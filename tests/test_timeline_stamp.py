@@ -1,13 +1,26 @@
+import concurrent.futures
 import copy
 import datetime as dt
-from pathlib import Path
+import json
+import threading
+import time
 from unittest import mock
 
-import pytz
+import numpy as np
+import pytest
 
 import timeline_stamp as ts
 
 
+@pytest.fixture(autouse=True)
+def clear_lookup_caches():
+    ts._tz_at.cache_clear()
+    ts._camera_day_offset.cache_clear()
+    yield
+    ts._tz_at.cache_clear()
+    ts._camera_day_offset.cache_clear()
+
+
 def make_exif(*, dt_original=b"2024:12:15 06:20:15", offset_original=None, gps=False):
     exif = {
         "0th": {ts.piexif.ImageIFD.DateTime: dt_original},
@@ -29,6 +42,13 @@ def make_exif(*, dt_original=b"2024:12:15 06:20:15", offset_original=None, gps=F
     return exif
 
 
+def write_jpeg(path, exif):
+    # SOI, a tiny APP0 segment, then SOS with the rest of the "image" and EOI.
+    jpeg = b"\xff\xd8\xff\xe0\x00\x04\x00\x00\xff\xda\x00\x02" + b"\x00" * 128 + b"\xff\xd9"
+    ts.piexif.insert(ts.piexif.dump(exif), jpeg, str(path))
+    return path
+
+
 def test_find_photo_paths_matches_jpegs_case_insensitively(tmp_path):
     for name in ["a.jpg", "b.jpeg", "c.JPG", "d.JPEG", "e.jpgg"]:
         (tmp_path / name).write_bytes(b"x")
@@ -38,15 +58,226 @@ def test_find_photo_paths_matches_jpegs_case_insensitively(tmp_path):
     assert matched == ["a.jpg", "b.jpeg", "c.JPG", "d.JPEG"]
 
 
+def test_load_timeline_points_reads_paths_and_visit_midpoints(tmp_path):
+    timeline_path = tmp_path / "Timeline.json"
+    timeline_path.write_text(
+        json.dumps(
+            {
+                "semanticSegments": [
+                    {
+                        "startTime": "2024-12-15T20:00:00.000+07:00",
+                        "endTime": "2024-12-15T22:00:00.000+07:00",
+                        "timelinePath": [
+                            {"point": "13.7563°, 100.5018°", "time": "2024-12-15T21:20:00.000+07:00"},
+                        ],
+                    },
+                    {
+                        "startTime": "2024-12-15T10:00:00.000+07:00",
+                        "endTime": "2024-12-15T12:00:00.000+07:00",
+                        "visit": {"topCandidate": {"placeLocation": {"latLng": "13.7000°, 100.4000°"}}},
+                    },
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    timeline = ts.load_timeline_points(timeline_path)
+
+    assert [timeline.point(i) for i in range(len(timeline))] == [
+        ts.TimelinePoint(dt.datetime(2024, 12, 15, 4, 0, tzinfo=dt.timezone.utc), 13.7, 100.4),
+        ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, tzinfo=dt.timezone.utc), 13.7563, 100.5018),
+    ]
+
+
+def test_load_timeline_points_streams_large_exports(tmp_path):
+    timeline_path = tmp_path / "Timeline.json"
+    timeline_path.write_text(
+        json.dumps(
+            {
+                "semanticSegments": [
+                    {
+                        "timelinePath": [
+                            {"point": "13.7563°, 100.5018°", "time": "2024-12-15T21:20:00.000+07:00"},
+                        ],
+                    },
+                ]
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    with mock.patch.object(ts, "STREAM_PARSE_THRESHOLD_BYTES", 0), \
+         mock.patch.object(ts.orjson, "loads", side_effect=AssertionError("unexpected full parse")):
+        timeline = ts.load_timeline_points(timeline_path)
+
+    assert timeline.point(0) == ts.TimelinePoint(
+        dt.datetime(2024, 12, 15, 14, 20, tzinfo=dt.timezone.utc), 13.7563, 100.5018
+    )
+
+
+def test_load_timeline_points_ignores_list_shaped_exports(tmp_path):
+    timeline_path = tmp_path / "Timeline.json"
+    timeline_path.write_text(
+        json.dumps([{"startTime": "2024-12-15T10:00:00.000+07:00", "visit": {}}]),
+        encoding="utf-8",
+    )
+
+    assert len(ts.load_timeline_points(timeline_path)) == 0
+
+
+def test_timeline_from_points_drops_duplicate_fixes():
+    base = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    timeline = ts.Timeline.from_points(
+        [
+            ts.TimelinePoint(base + dt.timedelta(minutes=1), 1.0, 1.0),
+            ts.TimelinePoint(base, 1.0, 1.0),
+            ts.TimelinePoint(base, 1.000001, 1.0),
+            ts.TimelinePoint(base, 2.0, 2.0),
+        ]
+    )
+
+    assert [timeline.point(i) for i in range(len(timeline))] == [
+        ts.TimelinePoint(base, 1.0, 1.0),
+        ts.TimelinePoint(base, 2.0, 2.0),
+        ts.TimelinePoint(base + dt.timedelta(minutes=1), 1.0, 1.0),
+    ]
+
+
+def test_find_nearest_timeline_point_picks_closest_neighbour():
+    base = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    timeline = ts.Timeline.from_points(
+        [
+            ts.TimelinePoint(base + dt.timedelta(minutes=10), 3.0, 3.0),
+            ts.TimelinePoint(base, 1.0, 1.0),
+            ts.TimelinePoint(base + dt.timedelta(minutes=4), 2.0, 2.0),
+        ]
+    )
+
+    assert ts.find_nearest_timeline_point(timeline, base - dt.timedelta(hours=1)).lat == 1.0
+    assert ts.find_nearest_timeline_point(timeline, base + dt.timedelta(minutes=3)).lat == 2.0
+    assert ts.find_nearest_timeline_point(timeline, base + dt.timedelta(minutes=8)).lat == 3.0
+    assert ts.find_nearest_timeline_point(timeline, base + dt.timedelta(hours=1)) == ts.TimelinePoint(
+        base + dt.timedelta(minutes=10), 3.0, 3.0
+    )
+    assert ts.find_nearest_timeline_point(ts.Timeline.from_points([]), base) is None
+
+
+def test_match_timeline_drops_matches_beyond_max_gap():
+    base = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    timeline = ts.Timeline.from_points(
+        [ts.TimelinePoint(base, 1.0, 1.0), ts.TimelinePoint(base + dt.timedelta(minutes=10), 2.0, 2.0)]
+    )
+    minute_ns = 60 * 10**9
+    base_ns = ts._datetime_to_ns(base)
+    photo_ns = base_ns + np.array([-5, 4, 5, 6, 20], dtype=np.int64) * minute_ns
+
+    matches = ts.match_timeline(timeline, photo_ns, 5 * minute_ns)
+
+    assert matches.tolist() == [0, 0, 1, 1, -1]
+
+
+def test_load_exif_fast_decodes_from_file_head(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif(offset_original=b"+07:00"))
+
+    with mock.patch.object(ts.piexif, "load", wraps=ts.piexif.load) as load:
+        exif = ts._load_exif_fast(photo)
+
+    assert isinstance(load.call_args.args[0], bytes)
+    assert exif["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 06:20:15"
+    assert exif["Exif"][ts.piexif.ExifIFD.OffsetTimeOriginal] == b"+07:00"
+
+
+def test_load_timestamp_tags_fast_matches_piexif(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif(offset_original=b"+07:00", gps=True))
+    decoded = ts.piexif.load(str(photo))["Exif"]
+
+    with mock.patch.object(ts.piexif, "load", side_effect=AssertionError("unexpected decode")):
+        tags = ts._load_timestamp_tags_fast(photo, ts._read_file_head(photo))
+
+    assert tags == {"Exif": {tag: decoded[tag] for tag in ts.EXIF_TIMESTAMP_TAGS}}
+
+
+def test_load_timestamp_tags_fast_falls_back_to_full_decode(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif())
+
+    with mock.patch.object(ts, "EXIF_HEADER_READ_BYTES", 32):
+        tags = ts._load_timestamp_tags_fast(photo, ts._read_file_head(photo))
+
+    assert tags == {"Exif": {ts.piexif.ExifIFD.DateTimeOriginal: b"2024:12:15 06:20:15"}}
+
+
+def test_load_exif_fast_falls_back_when_segment_exceeds_head(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif())
+
+    with mock.patch.object(ts, "EXIF_HEADER_READ_BYTES", 32):
+        exif = ts._load_exif_fast(photo)
+
+    assert exif["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 06:20:15"
+
+
+def test_match_timeline_compiled_and_numpy_paths_agree():
+    pytest.importorskip("numba")
+    rng = np.random.default_rng(0)
+    times = np.unique(rng.integers(0, 10**12, size=500))
+    timeline = ts.Timeline(times_ns=times, lats=np.zeros(len(times)), lons=np.zeros(len(times)))
+    photo_ns = np.concatenate([rng.integers(-10**10, 10**12 + 10**10, size=2000), times[:50], times[-50:] + 1])
+    max_gap_ns = 10**9
+
+    compiled = ts.match_timeline(timeline, photo_ns, max_gap_ns)
+    with mock.patch.object(ts, "_nearest_batch", None):
+        vectorised = ts.match_timeline(timeline, photo_ns, max_gap_ns)
+
+    assert compiled.tolist() == vectorised.tolist()
+
+
+def test_has_gps_fast_reads_gps_ifd(tmp_path):
+    with_gps = write_jpeg(tmp_path / "gps.jpg", make_exif(gps=True))
+    without_gps = write_jpeg(tmp_path / "plain.jpg", make_exif())
+
+    assert ts._has_gps_fast(ts._read_file_head(with_gps)) is True
+    assert ts._has_gps_fast(ts._read_file_head(without_gps)) is False
+    assert ts._has_gps_fast(b"not a jpeg") is False
+
+
+def test_main_skips_photos_with_gps_before_decoding_exif(tmp_path):
+    write_jpeg(tmp_path / "image.jpg", make_exif(gps=True))
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 1.0, 2.0)
+
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
+         mock.patch.object(ts.piexif, "load", side_effect=AssertionError("unexpected decode")), \
+         mock.patch.object(ts, "update_photo") as update_photo, \
+         mock.patch.object(ts.LOGGER, "info") as info_log:
+        ts.main(["--timeline", "/tmp/Timeline.json", "--photos", str(tmp_path)])
+
+    update_photo.assert_not_called()
+    assert info_log.call_args_list[-1].args == (
+        "Dry-run complete. %s photos WOULD be updated, %s skipped.",
+        0,
+        1,
+    )
+
+
+def test_find_photo_paths_recurses_into_subdirectories(tmp_path):
+    (tmp_path / "day1").mkdir()
+    (tmp_path / "day1" / "b.jpg").write_bytes(b"x")
+    (tmp_path / "day1" / "notes.txt").write_bytes(b"x")
+    (tmp_path / "folder.jpg").mkdir()
+    (tmp_path / "a.jpg").write_bytes(b"x")
+
+    matched = [path.relative_to(tmp_path).as_posix() for path in ts.find_photo_paths(tmp_path)]
+
+    assert matched == ["a.jpg", "day1/b.jpg"]
+
+
 def test_main_counts_update_photo_false_as_skipped(tmp_path):
     photo = tmp_path / "image.jpg"
     photo.write_bytes(b"x")
     point = ts.TimelinePoint(dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc), 1.0, 2.0)
     exif = make_exif(dt_original=b"2023:12:31 16:00:00")
 
-    with mock.patch.object(ts, "load_timeline_points", return_value=[point]), \
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
          mock.patch.object(ts.piexif, "load", return_value=exif), \
-         mock.patch.object(ts, "find_nearest_timeline_point", return_value=point), \
          mock.patch.object(ts, "update_photo", return_value=False):
         with mock.patch.object(ts.sys, "exit", side_effect=AssertionError("unexpected exit")):
             with mock.patch.object(ts.LOGGER, "info") as info_log:
@@ -59,7 +290,76 @@ def test_main_counts_update_photo_false_as_skipped(tmp_path):
     )
 
 
-def test_update_photo_preserves_absolute_time_when_offset_tags_exist():
+def test_main_counts_worker_failures_as_skipped(tmp_path):
+    for name in ["a.jpg", "b.jpg", "c.jpg"]:
+        (tmp_path / name).write_bytes(b"x")
+    point = ts.TimelinePoint(dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc), 1.0, 2.0)
+    exif = make_exif(dt_original=b"2023:12:31 16:00:00")
+
+    def fake_update_photo(photo, *args, **kwargs):
+        if photo.name == "b.jpg":
+            raise OSError("disk full")
+        return True
+
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
+         mock.patch.object(ts.piexif, "load", return_value=exif), \
+         mock.patch.object(ts, "update_photo", side_effect=fake_update_photo):
+        with mock.patch.object(ts.sys, "exit", side_effect=AssertionError("unexpected exit")):
+            with mock.patch.object(ts.LOGGER, "info") as info_log:
+                ts.main(["--timeline", "/tmp/Timeline.json", "--photos", str(tmp_path), "--workers", "2"])
+
+    assert info_log.call_args_list[-1].args == (
+        "Dry-run complete. %s photos WOULD be updated, %s skipped.",
+        2,
+        1,
+    )
+
+
+def test_run_bounded_limits_unfinished_tasks():
+    lock = threading.Lock()
+    active = peak = 0
+
+    def task():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        finished = [key for key, _ in ts._run_bounded(pool, ((i, task) for i in range(8)), 2)]
+
+    assert sorted(finished) == list(range(8))
+    assert peak <= 2
+
+
+def test_main_queues_each_file_once_across_links(tmp_path):
+    (tmp_path / "a.jpg").write_bytes(b"x")
+    ts.os.link(tmp_path / "a.jpg", tmp_path / "b.jpg")
+    (tmp_path / "c.jpg").write_bytes(b"x")
+    (tmp_path / "d.jpg").symlink_to(tmp_path / "c.jpg")
+    point = ts.TimelinePoint(dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc), 1.0, 2.0)
+    exif = make_exif(dt_original=b"2023:12:31 16:00:00")
+
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
+         mock.patch.object(ts.piexif, "load", return_value=exif), \
+         mock.patch.object(ts, "update_photo", return_value=True) as update_photo, \
+         mock.patch.object(ts.LOGGER, "info") as info_log:
+        ts.main(["--timeline", "/tmp/Timeline.json", "--photos", str(tmp_path), "--workers", "4"])
+
+    assert sorted(call.args[0].name for call in update_photo.call_args_list) == ["a.jpg", "c.jpg"]
+    assert info_log.call_args_list[-1].args == (
+        "Dry-run complete. %s photos WOULD be updated, %s skipped.",
+        2,
+        2,
+    )
+
+
+def test_update_photo_preserves_absolute_time_when_offset_tags_exist(tmp_path):
+    photo = tmp_path / "image.jpg"
+    photo.write_bytes(b"x")
     point = ts.TimelinePoint(
         dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc),
         13.7563,
@@ -76,14 +376,16 @@ def test_update_photo_preserves_absolute_time_when_offset_tags_exist():
         def timezone_at(self, *, lat, lng):
             return "Asia/Bangkok"
 
+        unique_timezone_at = timezone_at
+
     with mock.patch.object(ts.piexif, "load", return_value=copy.deepcopy(exif)), \
          mock.patch.object(ts.piexif, "dump", side_effect=fake_dump), \
          mock.patch.object(ts.piexif, "insert"), \
          mock.patch.object(ts, "tf", FakeTF()):
         result = ts.update_photo(
-            Path("/tmp/image.jpg"),
+            photo,
             point,
-            pytz.timezone("America/Los_Angeles"),
+            ts.ZoneInfo("America/Los_Angeles"),
             apply=True,
             overwrite_gps=True,
         )
@@ -93,6 +395,197 @@ def test_update_photo_preserves_absolute_time_when_offset_tags_exist():
     assert captured["exif"]["Exif"][ts.piexif.ExifIFD.OffsetTimeOriginal] == b"+07:00"
 
 
+class BangkokTF:
+    def timezone_at(self, *, lat, lng):
+        return "Asia/Bangkok"
+
+    unique_timezone_at = timezone_at
+
+
+def test_update_photo_patches_existing_tags_in_place(tmp_path):
+    exif = make_exif(dt_original=b"2024:12:15 06:20:15", offset_original=b"-08:00", gps=True)
+    exif["GPS"][ts.piexif.GPSIFD.GPSLatitudeRef] = b"S"
+    exif["GPS"][ts.piexif.GPSIFD.GPSLongitudeRef] = b"W"
+    photo = write_jpeg(tmp_path / "image.jpg", exif)
+    original_size = photo.stat().st_size
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 13.7563, 100.5018)
+
+    with mock.patch.object(ts.piexif, "insert", side_effect=AssertionError("unexpected rewrite")), \
+         mock.patch.object(ts, "tf", BangkokTF()):
+        assert ts.update_photo(photo, point, ts.ZoneInfo("America/Los_Angeles"), apply=True, overwrite_gps=True)
+
+    written = ts.piexif.load(str(photo))
+    assert photo.stat().st_size == original_size
+    assert written["0th"][ts.piexif.ImageIFD.DateTime] == b"2024:12:15 21:20:15"
+    assert written["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 21:20:15"
+    assert written["Exif"][ts.piexif.ExifIFD.OffsetTimeOriginal] == b"+07:00"
+    assert written["GPS"][ts.piexif.GPSIFD.GPSLatitudeRef] == b"N"
+    assert written["GPS"][ts.piexif.GPSIFD.GPSLatitude] == ((13, 1), (45, 1), (2267, 100))
+    assert written["GPS"][ts.piexif.GPSIFD.GPSLongitudeRef] == b"E"
+
+
+def test_update_photo_rewrites_exif_when_tags_are_missing(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif(dt_original=b"2024:12:15 06:20:15"))
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 13.7563, 100.5018)
+
+    with mock.patch.object(ts, "tf", BangkokTF()):
+        assert ts.update_photo(photo, point, ts.ZoneInfo("America/Los_Angeles"), apply=True)
+
+    written = ts.piexif.load(str(photo))
+    assert written["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 21:20:15"
+    assert written["Exif"][ts.piexif.ExifIFD.OffsetTime] == b"+07:00"
+    assert written["GPS"][ts.piexif.GPSIFD.GPSLongitudeRef] == b"E"
+
+
+def test_dms_rationals_matches_scalar_conversion():
+    def scalar(deg_float):
+        deg_abs = abs(deg_float)
+        deg = int(deg_abs)
+        minutes_float = (deg_abs - deg) * 60
+        minutes = int(minutes_float)
+        return [deg, minutes, int((minutes_float - minutes) * 60 * 100)]
+
+    coords = np.random.default_rng(0).uniform(-180, 180, size=(500, 2))
+
+    assert ts._dms_rationals(coords).tolist() == [[scalar(lat), scalar(lon)] for lat, lon in coords]
+
+
+def test_update_photo_backup_keeps_original_bytes(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif(dt_original=b"2024:12:15 06:20:15"))
+    original = photo.read_bytes()
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 13.7563, 100.5018)
+
+    with mock.patch.object(ts, "tf", BangkokTF()):
+        assert ts.update_photo(photo, point, ts.ZoneInfo("America/Los_Angeles"), apply=True, backup=True)
+
+    backup = tmp_path / "image.jpg.exif_backup"
+    assert backup.read_bytes() == original
+    assert not backup.samefile(photo)
+    assert ts.piexif.load(str(photo))["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 21:20:15"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["image.jpg", "image.jpg.exif_backup"]
+
+
+def test_update_photo_backup_keeps_inode_of_hardlinked_photo(tmp_path):
+    photo = write_jpeg(tmp_path / "image.jpg", make_exif(dt_original=b"2024:12:15 06:20:15"))
+    original = photo.read_bytes()
+    other_link = tmp_path / "album-copy.jpg"
+    ts.os.link(photo, other_link)
+    inode = photo.stat().st_ino
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 13.7563, 100.5018)
+
+    with mock.patch.object(ts, "tf", BangkokTF()):
+        assert ts.update_photo(photo, point, ts.ZoneInfo("America/Los_Angeles"), apply=True, backup=True)
+
+    backup = tmp_path / "image.jpg.exif_backup"
+    assert backup.read_bytes() == original
+    assert photo.stat().st_ino == inode
+    assert other_link.samefile(photo)
+    assert ts.piexif.load(str(other_link))["Exif"][ts.piexif.ExifIFD.DateTimeOriginal] == b"2024:12:15 21:20:15"
+
+
+def test_update_photo_backup_writes_through_symlinked_photo(tmp_path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "p").mkdir()
+    target = write_jpeg(tmp_path / "lib" / "real.jpg", make_exif(dt_original=b"2024:12:15 06:20:15"))
+    original = target.read_bytes()
+    link = tmp_path / "p" / "link.jpg"
+    link.symlink_to(target)
+    point = ts.TimelinePoint(dt.datetime(2024, 12, 15, 14, 20, 15, tzinfo=dt.timezone.utc), 13.7563, 100.5018)
+
+    with mock.patch.object(ts, "tf", BangkokTF()):
+        assert ts.update_photo(link, point, ts.ZoneInfo("America/Los_Angeles"), apply=True, backup=True)
+
+    backup = tmp_path / "p" / "link.jpg.exif_backup"
+    assert link.is_symlink()
+    assert not backup.is_symlink()
+    assert backup.read_bytes() == original
+    assert ts.piexif.load(str(target))["GPS"][ts.piexif.GPSIFD.GPSLongitudeRef] == b"E"
+
+
+def test_link_or_copy_falls_back_to_copy(tmp_path):
+    src = tmp_path / "image.jpg"
+    src.write_bytes(b"original")
+
+    with mock.patch.object(ts.os, "link", side_effect=OSError("cross-device link")):
+        ts._link_or_copy(src, tmp_path / "backup")
+
+    assert (tmp_path / "backup").read_bytes() == b"original"
+
+
+def test_timezone_name_at_caches_only_repeated_coordinates():
+    fake_tf = mock.Mock()
+    fake_tf.unique_timezone_at.return_value = "Asia/Bangkok"
+
+    with mock.patch.object(ts, "tf", fake_tf):
+        assert ts._timezone_name_at(13.7563, 100.5018) == "Asia/Bangkok"
+        assert ts._timezone_name_at(13.756300001, 100.5018) == "Asia/Bangkok"
+        assert ts._timezone_name_at(13.7601, 100.4951) == "Asia/Bangkok"
+
+    assert fake_tf.unique_timezone_at.call_args_list == [
+        mock.call(lat=13.7563, lng=100.5018),
+        mock.call(lat=13.7601, lng=100.4951),
+    ]
+
+
+def test_timezone_name_at_uses_exact_lookup_in_border_cells():
+    fake_tf = mock.Mock()
+    fake_tf.unique_timezone_at.return_value = None
+    fake_tf.timezone_at.return_value = "Europe/Andorra"
+
+    with mock.patch.object(ts, "tf", fake_tf):
+        assert ts._timezone_name_at(42.5063, 1.5218) == "Europe/Andorra"
+
+    fake_tf.timezone_at.assert_called_once_with(lat=42.5063, lng=1.5218)
+
+
+@pytest.mark.parametrize(
+    ("lat", "lon", "expected"),
+    [
+        (54.7104, 20.4522, "Europe/Kaliningrad"),
+        (50.2727, 127.5404, "Asia/Yakutsk"),
+        (36.9147, -111.4558, "America/Phoenix"),
+        (38.8814, -7.1631, "Europe/Lisbon"),
+        (42.0466, -8.6446, "Europe/Madrid"),
+        (-4.2153, -69.9406, "America/Bogota"),
+    ],
+)
+def test_timezone_name_at_matches_exact_finder_near_borders(lat, lon, expected):
+    assert ts._timezone_name_at(lat, lon) == expected
+
+
+def test_resolve_timezones_looks_up_only_matched_places():
+    base = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    timeline = ts.Timeline.from_points(
+        [
+            ts.TimelinePoint(base, 13.7563, 100.5018),
+            ts.TimelinePoint(base + dt.timedelta(minutes=1), 35.6762, 139.6503),
+            ts.TimelinePoint(base + dt.timedelta(minutes=2), 42.0466, -8.6446),
+            ts.TimelinePoint(base + dt.timedelta(minutes=3), 13.7563, 100.5018),
+        ]
+    )
+
+    with mock.patch.object(ts, "_timezone_name_at", side_effect=["Asia/Bangkok", "Europe/Madrid"]) as lookup:
+        ts._resolve_timezones(timeline, np.array([3, 2, 0, 3]))
+
+    assert timeline.tz_names == ["Asia/Bangkok", None, "Europe/Madrid", "Asia/Bangkok"]
+    assert lookup.call_count == 2
+
+
+def test_parse_exif_datetime_matches_strptime():
+    assert ts._parse_exif_datetime("2024:12:15 06:20:15") == dt.datetime(2024, 12, 15, 6, 20, 15)
+    assert ts._parse_exif_datetime("2024:1:5 6:20:15") == dt.datetime(2024, 1, 5, 6, 20, 15)
+    with pytest.raises(ValueError):
+        ts._parse_exif_datetime("2024:13:15 06:20:15")
+
+
+def test_camera_day_offset_only_covers_days_without_transitions():
+    los_angeles = ts.ZoneInfo("America/Los_Angeles")
+
+    assert ts._camera_day_offset(los_angeles, dt.date(2024, 7, 1)) == dt.timedelta(hours=-7)
+    assert ts._camera_day_offset(los_angeles, dt.date(2024, 3, 10)) is None
+    assert ts._camera_day_offset(los_angeles, dt.date(2024, 11, 3)) is None
+
+
 def test_main_uses_existing_offset_for_timeline_matching(tmp_path):
     photo = tmp_path / "image.jpg"
     photo.write_bytes(b"x")
@@ -103,7 +596,7 @@ def test_main_uses_existing_offset_for_timeline_matching(tmp_path):
     )
     exif = make_exif(dt_original=b"2024:12:15 21:20:15", offset_original=b"+07:00")
 
-    with mock.patch.object(ts, "load_timeline_points", return_value=[point]), \
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
          mock.patch.object(ts.piexif, "load", return_value=exif), \
          mock.patch.object(ts, "update_photo", return_value=True) as update_photo:
         with mock.patch.object(ts.sys, "exit", side_effect=AssertionError("unexpected exit")):
@@ -119,6 +612,24 @@ def test_main_uses_existing_offset_for_timeline_matching(tmp_path):
             )
 
     update_photo.assert_called_once()
+    assert update_photo.call_args.args[1].tz_name == "Asia/Bangkok"
+
+
+def test_main_decodes_exif_once_per_photo(tmp_path):
+    write_jpeg(tmp_path / "image.jpg", make_exif(dt_original=b"2023:12:31 16:00:00"))
+    point = ts.TimelinePoint(dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc), 1.0, 2.0)
+
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
+         mock.patch.object(ts.piexif, "load", wraps=ts.piexif.load) as load, \
+         mock.patch.object(ts.LOGGER, "info") as info_log:
+        ts.main(["--timeline", "/tmp/Timeline.json", "--photos", str(tmp_path)])
+
+    load.assert_called_once()
+    assert info_log.call_args_list[-1].args == (
+        "Dry-run complete. %s photos WOULD be updated, %s skipped.",
+        1,
+        0,
+    )
 
 
 def test_main_disambiguates_fall_back_time_using_timeline(tmp_path):
@@ -131,7 +642,7 @@ def test_main_disambiguates_fall_back_time_using_timeline(tmp_path):
     )
     exif = make_exif(dt_original=b"2024:11:03 01:30:00")
 
-    with mock.patch.object(ts, "load_timeline_points", return_value=[point]), \
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
          mock.patch.object(ts.piexif, "load", return_value=exif), \
          mock.patch.object(ts, "update_photo", return_value=True) as update_photo:
         with mock.patch.object(ts.sys, "exit", side_effect=AssertionError("unexpected exit")):
@@ -161,7 +672,7 @@ def test_main_skips_nonexistent_spring_forward_time(tmp_path):
     )
     exif = make_exif(dt_original=b"2024:03:10 02:30:00")
 
-    with mock.patch.object(ts, "load_timeline_points", return_value=[point]), \
+    with mock.patch.object(ts, "load_timeline_points", return_value=ts.Timeline.from_points([point])), \
          mock.patch.object(ts.piexif, "load", return_value=exif), \
          mock.patch.object(ts, "update_photo", return_value=True) as update_photo, \
          mock.patch.object(ts.LOGGER, "warning") as warning_log, \
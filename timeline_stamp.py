@@ -11,19 +11,21 @@ This script does two things for every JPEG in a directory:
 
 Strategy
 --------
-- We *stream* the 30-something-MB `Timeline.json` with *ijson* so that the
-  whole file is **never** loaded into memory at once.
+- The 30-something-MB `Timeline.json` is parsed in one go with *orjson*;
+  only exports above `STREAM_PARSE_THRESHOLD_BYTES` are *streamed* with
+  *ijson* so that the whole file is never loaded into memory at once.
 - Every coordinate in `semanticSegments[].timelinePath[]` becomes an entry
   of the form (utc_datetime, lat, lng).
   *If a segment is a stationary `visit`, we create a single point at the
   segment's midpoint using the topCandidate location.*
-- All points are sorted, giving a searchable timeline that supports fast
-  nearest-neighbour lookup via `bisect`.
+- All points are sorted and stored column-wise in NumPy arrays (UTC
+  nanoseconds, latitudes, longitudes), giving a searchable timeline that
+  supports fast nearest-neighbour lookup via `numpy.searchsorted`.
 - Each JPEG is read with *piexif*:
   * The naive `DateTimeOriginal` is treated as having the camera's
     timezone (default America/Los_Angeles, configurable).
   * The script finds the closest timeline point (default ≤60 min).
-  * Using *timezonefinder* ➔ IANA tz name ➔ *pytz*, we convert the moment
+  * Using *timezonefinder* ➔ IANA tz name ➔ *zoneinfo*, we convert the moment
     into local time and compute the UTC offset string (+07:00, etc.).
   * EXIF tags are updated in-place:
       - DateTime, DateTimeOriginal, DateTimeDigitized
@@ -44,33 +46,102 @@ changes are saved.
 from __future__ import annotations
 
 import argparse
-import bisect
+import concurrent.futures
 import datetime as dt
+import functools
 import logging
+import os
 import pathlib
 import re
+import struct
 import sys
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Iterable, List, NamedTuple, Tuple
 
 import ijson  # type: ignore
+import numpy as np
+import orjson
 import piexif  # type: ignore
-import pytz  # type: ignore
 import shutil
-from dateutil import parser as dtparse  # type: ignore
+from ciso8601 import parse_datetime
 from timezonefinder import TimezoneFinder  # type: ignore
 
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8
+    from backports.zoneinfo import ZoneInfo  # type: ignore
+
+try:  # optional: JIT-compiled timeline matching (pip install timeline-stamp[fast])
+    import numba  # type: ignore
+except ImportError:
+    numba = None
+
 LOGGER = logging.getLogger("timeline_stamp")
 
 # ---------------------------------------------------------------------------
-# Utility dataclasses
+# Utility types
 # ---------------------------------------------------------------------------
 
-@dataclass(order=True)
-class TimelinePoint:
+class TimelinePoint(NamedTuple):
     time_utc: dt.datetime
     lat: float
     lon: float
+    tz_name: str | None = None
+
+
+_EPOCH_UTC = dt.datetime(1970, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def _datetime_to_ns(ts: dt.datetime) -> int:
+    """Convert an aware datetime into integer nanoseconds since the epoch."""
+    return (ts - _EPOCH_UTC) // dt.timedelta(microseconds=1) * 1000
+
+
+def _ns_to_datetime(ns: int) -> dt.datetime:
+    """Inverse of :func:`_datetime_to_ns` (microsecond precision, UTC)."""
+    return _EPOCH_UTC + dt.timedelta(microseconds=ns // 1000)
+
+
+@dataclass
+class Timeline:
+    """Sorted timeline stored as parallel NumPy columns.
+
+    Keeping the timestamps in one contiguous ``int64`` array lets lookups use
+    ``numpy.searchsorted`` without materialising Python objects per query.
+    """
+
+    times_ns: np.ndarray  # int64, UTC nanoseconds since the epoch, ascending
+    lats: np.ndarray  # float64
+    lons: np.ndarray  # float64
+    tz_names: list[str | None] | None = None  # IANA zone per point, filled by _resolve_timezones
+
+    @classmethod
+    def from_points(cls, points: Iterable[TimelinePoint]) -> Timeline:
+        # Stationary segments repeat the same fix many times; keep the first.
+        unique = {}
+        for p in points:
+            unique.setdefault((p.time_utc, round(p.lat, 5), round(p.lon, 5)), p)
+        ordered = sorted(unique.values(), key=lambda p: p.time_utc)
+        times = np.array(
+            [p.time_utc.astimezone(dt.timezone.utc).replace(tzinfo=None) for p in ordered],
+            dtype="datetime64[ns]",
+        )
+        return cls(
+            times_ns=times.view("i8"),
+            lats=np.array([p.lat for p in ordered], dtype=np.float64),
+            lons=np.array([p.lon for p in ordered], dtype=np.float64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.times_ns)
+
+    def point(self, idx: int) -> TimelinePoint:
+        return TimelinePoint(
+            _ns_to_datetime(int(self.times_ns[idx])),
+            float(self.lats[idx]),
+            float(self.lons[idx]),
+            self.tz_names[idx] if self.tz_names is not None else None,
+        )
 
 
 class PhotoTimestampError(Exception):
@@ -90,34 +161,48 @@ class AmbiguousDateTimeOriginalError(PhotoTimestampError):
 
 
 # ---------------------------------------------------------------------------
-# Parsing Google Timeline.json lazily with ijson
+# Parsing Google Timeline.json
 # ---------------------------------------------------------------------------
 
-def load_timeline_points(timeline_path: pathlib.Path) -> List[TimelinePoint]:
-    """Stream-parse Timeline.json and return sorted list of TimelinePoint."""
+# Exports larger than this are streamed with ijson rather than parsed whole.
+STREAM_PARSE_THRESHOLD_BYTES = 500 * 1024 * 1024
+
+
+def _iter_segments(timeline_path: pathlib.Path):
+    """Yield ``semanticSegments`` entries, streaming only for very large files."""
+    if timeline_path.stat().st_size > STREAM_PARSE_THRESHOLD_BYTES:
+        with timeline_path.open("rb") as f:
+            yield from ijson.items(f, "semanticSegments.item")
+    else:
+        data = orjson.loads(timeline_path.read_bytes())
+        # Other exports (e.g. iOS) are a top-level array; like ijson, find nothing.
+        segments = data.get("semanticSegments") if isinstance(data, dict) else None
+        yield from segments or ()
+
+
+def load_timeline_points(timeline_path: pathlib.Path) -> Timeline:
+    """Parse Timeline.json and return the sorted :class:`Timeline`."""
     tf_points: List[TimelinePoint] = []
 
-    with timeline_path.open("rb") as f:
-        segments = ijson.items(f, "semanticSegments.item")
-        for seg in segments:
-            try:
-                if "timelinePath" in seg:
-                    for entry in seg.get("timelinePath", []):
-                        _add_point_from_path_entry(tf_points, entry)
-                elif "visit" in seg:
-                    _add_point_from_visit(tf_points, seg)
-            except Exception as exc:
-                LOGGER.warning("Failed to parse segment entry: %s", exc)
+    for seg in _iter_segments(timeline_path):
+        try:
+            if "timelinePath" in seg:
+                for entry in seg.get("timelinePath", []):
+                    _add_point_from_path_entry(tf_points, entry)
+            elif "visit" in seg:
+                _add_point_from_visit(tf_points, seg)
+        except Exception as exc:
+            LOGGER.warning("Failed to parse segment entry: %s", exc)
 
-    tf_points.sort(key=lambda p: p.time_utc)
-    LOGGER.info("Loaded %s timeline points", len(tf_points))
-    return tf_points
+    timeline = Timeline.from_points(tf_points)
+    LOGGER.info("Loaded %s timeline points", len(timeline))
+    return timeline
 
 
 def _add_point_from_path_entry(tf_points: List[TimelinePoint], entry):
     """Extract a point from a timelinePath entry."""
     lat, lon = _parse_latlng(entry["point"])
-    time_local = dtparse.isoparse(entry["time"])  # timezone aware
+    time_local = parse_datetime(entry["time"])  # timezone aware
     tf_points.append(TimelinePoint(time_local.astimezone(dt.timezone.utc), lat, lon))
 
 
@@ -129,8 +214,8 @@ def _add_point_from_visit(tf_points: List[TimelinePoint], seg):
     except (KeyError, TypeError, ValueError):
         # nothing usable
         return
-    start = dtparse.isoparse(seg["startTime"]).astimezone(dt.timezone.utc)
-    end = dtparse.isoparse(seg["endTime"]).astimezone(dt.timezone.utc)
+    start = parse_datetime(seg["startTime"]).astimezone(dt.timezone.utc)
+    end = parse_datetime(seg["endTime"]).astimezone(dt.timezone.utc)
     midpoint = start + (end - start) / 2
     tf_points.append(TimelinePoint(midpoint, lat, lon))
 
@@ -147,44 +232,190 @@ def _parse_latlng(ll_str: str) -> Tuple[float, float]:
 # ---------------------------------------------------------------------------
 
 tf = TimezoneFinder()
-JPEG_SUFFIXES = {".jpg", ".jpeg"}
+JPEG_SUFFIXES = (".jpg", ".jpeg")
+# APP1 segments are capped at 64 KB, so Exif nearly always fits in this prefix.
+EXIF_HEADER_READ_BYTES = 65536
 EXIF_OFFSET_TAGS = (
     piexif.ExifIFD.OffsetTimeOriginal,
     piexif.ExifIFD.OffsetTimeDigitized,
     piexif.ExifIFD.OffsetTime,
 )
+# Exif IFD tags the first pass needs to place a photo in time.
+EXIF_TIMESTAMP_TAGS = (piexif.ExifIFD.DateTimeOriginal,) + EXIF_OFFSET_TAGS
+# Every (IFD, tag) that update_photo rewrites.
+EXIF_UPDATED_KEYS = (
+    ("0th", piexif.ImageIFD.DateTime),
+    ("Exif", piexif.ExifIFD.DateTimeOriginal),
+    ("Exif", piexif.ExifIFD.DateTimeDigitized),
+    ("Exif", piexif.ExifIFD.OffsetTime),
+    ("Exif", piexif.ExifIFD.OffsetTimeOriginal),
+    ("Exif", piexif.ExifIFD.OffsetTimeDigitized),
+    ("GPS", piexif.GPSIFD.GPSLatitudeRef),
+    ("GPS", piexif.GPSIFD.GPSLatitude),
+    ("GPS", piexif.GPSIFD.GPSLongitudeRef),
+    ("GPS", piexif.GPSIFD.GPSLongitude),
+)
 EXIF_OFFSET_RE = re.compile(r"^([+-])(\d{2}):(\d{2})$")
+# Timezone lookups are cached on coordinates rounded to ~1 m, the precision
+# Timeline.from_points dedupes on; coarser keys would leak zones across borders.
+TZ_CACHE_DIGITS = 5
+
 
+@functools.lru_cache(maxsize=4096)
+def _tz_at(lat_q: float, lon_q: float) -> str | None:
+    # A shortcut cell holding a single zone answers without the polygon test;
+    # cells split by a border (or with no zone at all) need the exact lookup.
+    return tf.unique_timezone_at(lat=lat_q, lng=lon_q) or tf.timezone_at(lat=lat_q, lng=lon_q)
 
-def find_nearest_timeline_point(points: List[TimelinePoint], ts: dt.datetime) -> TimelinePoint | None:
+
+def _timezone_name_at(lat: float, lon: float) -> str | None:
+    """IANA timezone at *lat*/*lon*, memoised on coordinates rounded to ~1 m."""
+    return _tz_at(round(lat, TZ_CACHE_DIGITS), round(lon, TZ_CACHE_DIGITS))
+
+
+def _resolve_timezones(timeline: Timeline, indices: np.ndarray) -> None:
+    """Fill ``timeline.tz_names`` for the points at *indices*, one lookup per place."""
+    if timeline.tz_names is None:
+        timeline.tz_names = [None] * len(timeline)
+    indices = np.unique(indices)
+    if not len(indices):
+        return
+    places = np.round(np.column_stack((timeline.lats[indices], timeline.lons[indices])), TZ_CACHE_DIGITS)
+    _, first, inverse = np.unique(places, axis=0, return_index=True, return_inverse=True)
+    names = [
+        _timezone_name_at(float(timeline.lats[indices[i]]), float(timeline.lons[indices[i]]))
+        for i in first
+    ]
+    for idx, place in zip(indices.tolist(), inverse.ravel().tolist()):
+        timeline.tz_names[idx] = names[place]
+
+
+def find_nearest_timeline_point(timeline: Timeline, ts: dt.datetime) -> TimelinePoint | None:
     """Binary-search for timeline point nearest to *ts* (UTC)."""
-    keys = [p.time_utc for p in points]
-    idx = bisect.bisect_left(keys, ts)
-    candidates = []
-    if idx < len(points):
-        candidates.append(points[idx])
-    if idx > 0:
-        candidates.append(points[idx - 1])
-    if not candidates:
+    times = timeline.times_ns
+    if not len(times):
         return None
-    return min(candidates, key=lambda p: abs(p.time_utc - ts))
+    ts_ns = _datetime_to_ns(ts)
+    idx = int(np.searchsorted(times, ts_ns))
+    # Ties go to the later point.
+    if idx == len(times) or (idx > 0 and ts_ns - times[idx - 1] < times[idx] - ts_ns):
+        idx -= 1
+    return timeline.point(idx)
+
+
+def _iter_jpegs(root: str) -> Iterable[str]:
+    """Yield JPEG file paths under *root* using ``os.scandir``; unreadable dirs are skipped."""
+    pending = [root]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.name.lower().endswith(JPEG_SUFFIXES) and entry.is_file():
+                        yield entry.path
+        except OSError as exc:
+            LOGGER.debug("Cannot scan %s: %s", exc.filename, exc)
 
 
 def find_photo_paths(photos_dir: pathlib.Path) -> List[pathlib.Path]:
     """Return JPEG paths recursively, matching extensions case-insensitively."""
-    return sorted(
-        path
-        for path in photos_dir.rglob("*")
-        if path.is_file() and path.suffix.lower() in JPEG_SUFFIXES
+    paths = list(_iter_jpegs(str(photos_dir)))
+    paths.sort()
+    return [pathlib.Path(path) for path in paths]
+
+
+def _locate_exif_segment(head: bytes) -> tuple[int, int] | None:
+    """Return ``(start, end)`` offsets of the Exif APP1 segment in a JPEG prefix.
+
+    *end* may point past the prefix if the segment is truncated. ``None`` means
+    no Exif segment was found before the image data or the prefix ran out.
+    """
+    if head[:2] != b"\xff\xd8":
+        return None
+    pos = 2
+    while pos + 10 <= len(head):
+        marker = head[pos:pos + 2]
+        if marker[0] != 0xFF or marker == b"\xff\xda":
+            return None
+        end = pos + 2 + struct.unpack(">H", head[pos + 2:pos + 4])[0]
+        if marker == b"\xff\xe1" and head[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return pos, end
+        pos = end
+    return None
+
+
+def _read_file_head(path: pathlib.Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read(EXIF_HEADER_READ_BYTES)
+
+
+def _load_exif_fast(path: pathlib.Path, head: bytes | None = None):
+    """``piexif.load`` that decodes Exif from a single bounded read of the file head."""
+    if head is None:
+        head = _read_file_head(path)
+    segment = _locate_exif_segment(head)
+    if segment is not None and segment[1] <= len(head):
+        return piexif.load(head[segment[0] + 4:segment[1]])
+    return piexif.load(str(path))
+
+
+def _has_gps_fast(head: bytes) -> bool:
+    """Whether the GPS IFD holds latitude and longitude, without decoding the Exif.
+
+    Only walks the IFD entry tables; anything unreadable reports ``False`` so
+    the full check in :func:`update_photo` still applies.
+    """
+    segment = _locate_exif_segment(head)
+    if segment is None or segment[1] > len(head):
+        return False
+    try:
+        _, ifds = _read_tiff_ifds(head[segment[0] + 10:segment[1]])
+    except (ValueError, struct.error):
+        return False
+    gps_ifd = ifds["GPS"]
+    return all(
+        tag in gps_ifd and gps_ifd[tag][1] > 0
+        for tag in (piexif.GPSIFD.GPSLatitude, piexif.GPSIFD.GPSLongitude)
     )
 
 
+def _load_timestamp_tags_fast(path: pathlib.Path, head: bytes):
+    """``EXIF_TIMESTAMP_TAGS`` as a minimal piexif-style dict, without decoding the Exif.
+
+    Reads the ASCII values straight from the IFD entries in *head*; anything
+    the raw reader cannot handle goes through :func:`_load_exif_fast`, and
+    only these tags are kept from that decode.
+    """
+    segment = _locate_exif_segment(head)
+    if segment is not None and segment[1] <= len(head):
+        tiff = head[segment[0] + 10:segment[1]]
+        try:
+            _, ifds = _read_tiff_ifds(tiff)
+            tags = {}
+            for tag in EXIF_TIMESTAMP_TAGS:
+                entry = ifds["Exif"].get(tag)
+                if entry is None or entry[0] != TIFF_ASCII:
+                    continue
+                _, count, value_offset = entry
+                if value_offset + count > len(tiff):
+                    raise ValueError("Exif value past end of segment")
+                # Like piexif, drop the terminating NUL.
+                tags[tag] = tiff[value_offset:value_offset + count - 1]
+            return {"Exif": tags}
+        except (ValueError, struct.error):
+            pass
+    exif_ifd = _load_exif_fast(path, head).get("Exif", {})
+    return {"Exif": {tag: exif_ifd[tag] for tag in EXIF_TIMESTAMP_TAGS if tag in exif_ifd}}
+
+
 def _decode_exif_text(value: bytes | str) -> str:
     if isinstance(value, bytes):
         return value.decode().strip("\x00").strip()
     return value.strip("\x00").strip()
 
 
+@functools.lru_cache(maxsize=None)
 def _parse_offset_tz(offset_value: str) -> dt.tzinfo:
     match = EXIF_OFFSET_RE.fullmatch(offset_value)
     if match is None:
@@ -203,9 +434,37 @@ def _datetime_original_text(exif_dict) -> str:
     return _decode_exif_text(raw_original)
 
 
-def _photo_timestamp_candidates_utc(exif_dict, camera_tz: pytz.BaseTzInfo) -> list[dt.datetime]:
+def _parse_exif_datetime(text: str) -> dt.datetime:
+    """Parse ``YYYY:MM:DD HH:MM:SS`` by slicing, deferring odd shapes to strptime."""
+    if len(text) == 19 and text[4] == text[7] == text[13] == text[16] == ":" and text[10] == " ":
+        try:
+            return dt.datetime(
+                int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                int(text[11:13]), int(text[14:16]), int(text[17:19]),
+            )
+        except ValueError:
+            pass
+    return dt.datetime.strptime(text, "%Y:%m:%d %H:%M:%S")
+
+
+@functools.lru_cache(maxsize=4096)
+def _camera_day_offset(camera_tz: dt.tzinfo, day: dt.date) -> dt.timedelta | None:
+    """UTC offset of *camera_tz* that holds for all of local *day*, if any.
+
+    Compares the offsets at UTC instants a day either side of *day* (wider
+    than any zone's offset range); returns ``None`` when they differ so the
+    caller falls back to full DST-aware localisation. This assumes no zone
+    changes offset and back again within those three days.
+    """
+    midnight = dt.datetime.combine(day, dt.time(), tzinfo=dt.timezone.utc)
+    before = (midnight - dt.timedelta(days=1)).astimezone(camera_tz).utcoffset()
+    after = (midnight + dt.timedelta(days=2)).astimezone(camera_tz).utcoffset()
+    return before if before == after else None
+
+
+def _photo_timestamp_candidates_utc(exif_dict, camera_tz: ZoneInfo) -> list[dt.datetime]:
     original_str = _datetime_original_text(exif_dict)
-    naive_dt = dt.datetime.strptime(original_str, "%Y:%m:%d %H:%M:%S")
+    naive_dt = _parse_exif_datetime(original_str)
 
     for tag in EXIF_OFFSET_TAGS:
         raw_offset = exif_dict.get("Exif", {}).get(tag)
@@ -218,44 +477,121 @@ def _photo_timestamp_candidates_utc(exif_dict, camera_tz: pytz.BaseTzInfo) -> li
             continue
         return [naive_dt.replace(tzinfo=offset_tz).astimezone(dt.timezone.utc)]
 
-    try:
-        return [camera_tz.localize(naive_dt, is_dst=None).astimezone(dt.timezone.utc)]
-    except pytz.NonExistentTimeError as exc:
+    day_offset = _camera_day_offset(camera_tz, naive_dt.date())
+    if day_offset is not None:
+        return [(naive_dt - day_offset).replace(tzinfo=dt.timezone.utc)]
+
+    # fold=0/1 pick the earlier/later reading of a repeated wall time; a wall
+    # time that does not round-trip fell into a spring-forward gap.
+    candidates = []
+    for fold in (0, 1):
+        instant = naive_dt.replace(tzinfo=camera_tz, fold=fold).astimezone(dt.timezone.utc)
+        if instant.astimezone(camera_tz).replace(tzinfo=None) == naive_dt and instant not in candidates:
+            candidates.append(instant)
+    if not candidates:
         raise NonexistentDateTimeOriginalError(
-            f"DateTimeOriginal {original_str} does not exist in camera timezone {camera_tz.zone}"
-        ) from exc
-    except pytz.AmbiguousTimeError:
-        return sorted(
-            camera_tz.localize(naive_dt, is_dst=is_dst).astimezone(dt.timezone.utc)
-            for is_dst in (True, False)
+            f"DateTimeOriginal {original_str} does not exist in camera timezone {camera_tz.key}"
         )
+    return sorted(candidates)
 
 
-def _photo_timestamp_utc(exif_dict, camera_tz: pytz.BaseTzInfo) -> dt.datetime:
+def _photo_timestamp_utc(exif_dict, camera_tz: ZoneInfo) -> dt.datetime:
     candidates = _photo_timestamp_candidates_utc(exif_dict, camera_tz)
     if len(candidates) > 1:
         raise AmbiguousDateTimeOriginalError(
-            f"DateTimeOriginal {_datetime_original_text(exif_dict)} is ambiguous in camera timezone {camera_tz.zone}"
+            f"DateTimeOriginal {_datetime_original_text(exif_dict)} is ambiguous in camera timezone {camera_tz.key}"
         )
     return candidates[0]
 
 
+def _nearest_batch(tl_ns: np.ndarray, photo_ns: np.ndarray, max_gap_ns: int) -> np.ndarray:
+    """Scalar-loop twin of the NumPy path in :func:`match_timeline`, for numba.
+
+    *tl_ns* must be non-empty and *photo_ns* ascending. Each search gallops
+    forward from the previous answer, so a batch costs O(M + N) overall, and
+    the final lower-bound search keeps the comparison out of the loop's
+    control flow so it compiles to a conditional move.
+    """
+    n = tl_ns.shape[0]
+    out = np.empty(photo_ns.shape[0], dtype=np.int64)
+    lo = 0
+    for k in range(photo_ns.shape[0]):
+        t = photo_ns[k]
+        # Bracket the lower bound in [lo, hi] by doubling steps from lo.
+        hi = lo
+        step = 1
+        while hi < n and tl_ns[hi] < t:
+            lo = hi + 1
+            hi += step
+            step <<= 1
+        if hi > n:
+            hi = n
+        base = lo
+        length = hi - lo
+        if length > 0:
+            while length > 1:
+                half = length >> 1
+                if tl_ns[base + half] < t:
+                    base += half
+                length -= half
+            base += 1 if tl_ns[base] < t else 0
+        idx = base
+        lo = idx
+        best = idx if idx < n else n - 1
+        if idx > 0 and (idx == n or t - tl_ns[idx - 1] < tl_ns[idx] - t):
+            best = idx - 1
+        out[k] = best if abs(tl_ns[best] - t) <= max_gap_ns else -1
+    return out
+
+
+if numba is not None:
+    _nearest_batch = numba.njit(cache=True)(_nearest_batch)
+else:
+    _nearest_batch = None
+
+
+def match_timeline(timeline: Timeline, ts_ns: np.ndarray, max_gap_ns: int) -> np.ndarray:
+    """Vectorised nearest-neighbour lookup for a batch of UTC nanosecond timestamps.
+
+    Returns the index of the closest timeline point for every entry of
+    *ts_ns* (ties go to the later point), or -1 where that point is more than
+    *max_gap_ns* away.
+    """
+    times = timeline.times_ns
+    if not len(times):
+        return np.full(len(ts_ns), -1, dtype=np.int64)
+    # Both sides sorted turns the batch into a merge: the compiled kernel
+    # resumes from its previous position and searchsorted narrows its bounds.
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    order = np.argsort(ts_ns, kind="stable")
+    sorted_ns = ts_ns[order]
+    if _nearest_batch is not None:
+        sorted_matches = _nearest_batch(times, sorted_ns, max_gap_ns)
+    else:
+        idx = np.searchsorted(times, sorted_ns)
+        left = np.clip(idx - 1, 0, len(times) - 1)
+        right = np.clip(idx, 0, len(times) - 1)
+        nearest = np.where(np.abs(times[left] - sorted_ns) < np.abs(times[right] - sorted_ns), left, right)
+        sorted_matches = np.where(np.abs(times[nearest] - sorted_ns) <= max_gap_ns, nearest, -1)
+    matches = np.empty_like(sorted_matches)
+    matches[order] = sorted_matches
+    return matches
+
+
 def _resolve_photo_timestamp_utc(
-    points: List[TimelinePoint],
-    exif_dict,
-    camera_tz: pytz.BaseTzInfo,
-    max_gap: dt.timedelta,
+    timeline: Timeline,
+    original_str: str,
+    candidates: list[dt.datetime],
+    matches: np.ndarray,
 ) -> tuple[dt.datetime, TimelinePoint] | None:
-    candidates = _photo_timestamp_candidates_utc(exif_dict, camera_tz)
+    """Pick the candidate instant whose timeline match (from :func:`match_timeline`) is closest."""
     ranked_matches = []
 
-    for candidate in candidates:
-        tl_point = find_nearest_timeline_point(points, candidate)
-        if tl_point is None:
+    for candidate, idx in zip(candidates, matches):
+        if idx < 0:
             continue
-        gap = abs(tl_point.time_utc - candidate)
-        if gap <= max_gap:
-            ranked_matches.append((gap, candidate, tl_point))
+        tl_point = timeline.point(idx)
+        ranked_matches.append((abs(tl_point.time_utc - candidate), candidate, tl_point))
 
     if not ranked_matches:
         return None
@@ -263,7 +599,7 @@ def _resolve_photo_timestamp_utc(
     ranked_matches.sort(key=lambda item: (item[0], item[1]))
     if len(ranked_matches) > 1 and ranked_matches[0][0] == ranked_matches[1][0]:
         raise AmbiguousDateTimeOriginalError(
-            f"DateTimeOriginal {_datetime_original_text(exif_dict)} is ambiguous and timeline matching could not disambiguate it"
+            f"DateTimeOriginal {original_str} is ambiguous and timeline matching could not disambiguate it"
         )
 
     _, photo_dt_utc, tl_point = ranked_matches[0]
@@ -273,16 +609,23 @@ def _resolve_photo_timestamp_utc(
 def update_photo(
     filepath: pathlib.Path,
     tl_point: TimelinePoint,
-    camera_tz: pytz.BaseTzInfo,
+    camera_tz: ZoneInfo,
     *,
     photo_dt_utc: dt.datetime | None = None,
+    gps_dms: np.ndarray | None = None,
     apply: bool = False,
     backup: bool = False,
     overwrite_gps: bool = False,
 ):
-    """Rewrite EXIF of *filepath* using timeline point lat/lon and timezone."""
+    """Rewrite EXIF of *filepath* using timeline point lat/lon and timezone.
+
+    Pass the already resolved *photo_dt_utc* to skip re-deriving the capture
+    moment from EXIF. *gps_dms* optionally supplies the point's coordinates
+    already split by :func:`_dms_rationals` (shape ``(2, 3)``: latitude,
+    longitude).
+    """
     # Read existing EXIF
-    exif_dict = piexif.load(str(filepath))
+    exif_dict = _load_exif_fast(filepath)
 
     # Skip if GPS already present and we're not overwriting
     if not overwrite_gps:
@@ -304,32 +647,34 @@ def update_photo(
             LOGGER.warning("%s %s; skipped", filepath.name, exc)
             return False
 
-    # Local timezone by coord
-    tz_name = tf.timezone_at(lat=tl_point.lat, lng=tl_point.lon)
+    # Local timezone by coord (precomputed for points matched in main)
+    tz_name = tl_point.tz_name or _timezone_name_at(tl_point.lat, tl_point.lon)
     if tz_name is None:
         LOGGER.warning("Could not find timezone for %s; skipped", filepath.name)
         return False
-    local_tz = pytz.timezone(tz_name)
+    local_tz = ZoneInfo(tz_name)
     local_dt = aware_utc.astimezone(local_tz)
 
     offset = local_dt.utcoffset() or dt.timedelta(0)
     offset_str = _format_tz_offset(offset)
 
     # Update date/time fields
-    dt_bytes = local_dt.strftime("%Y:%m:%d %H:%M:%S").encode()
+    local_dt_str = local_dt.strftime("%Y:%m:%d %H:%M:%S")
+    dt_bytes = local_dt_str.encode("ascii")
     for ifd, tag in (("Exif", piexif.ExifIFD.DateTimeOriginal),
                      ("Exif", piexif.ExifIFD.DateTimeDigitized),
                      ("0th", piexif.ImageIFD.DateTime)):
         exif_dict[ifd][tag] = dt_bytes
 
     # OffsetTime* – piexif defines these only in ExifIFD
+    offset_bytes = offset_str.encode("ascii")
     for tag in (piexif.ExifIFD.OffsetTime,  # 0x9010 – applies to 0th DateTime
                 piexif.ExifIFD.OffsetTimeOriginal,
                 piexif.ExifIFD.OffsetTimeDigitized):
-        exif_dict["Exif"][tag] = offset_str.encode()
+        exif_dict["Exif"][tag] = offset_bytes
 
     # GPS tags
-    _write_gps(exif_dict, tl_point.lat, tl_point.lon)
+    _write_gps(exif_dict, tl_point.lat, tl_point.lon, gps_dms)
 
     if apply:
         # Backup & write (optional)
@@ -337,18 +682,67 @@ def update_photo(
             backup_path = filepath.with_suffix(filepath.suffix + ".exif_backup")
             if not backup_path.exists():
                 try:
-                    shutil.copy2(filepath, backup_path)
+                    if _inode_is_replaceable(filepath):
+                        _link_or_copy(filepath, backup_path)
+                    else:
+                        shutil.copy2(filepath, backup_path)
                 except Exception as exc:
                     LOGGER.warning("Could not create backup for %s: %s", filepath.name, exc)
-
-        piexif.insert(piexif.dump(exif_dict), str(filepath))
+            # A hardlinked backup shares the original's inode, so never write through it.
+            if backup_path.exists() and backup_path.samefile(filepath):
+                _replace_exif(filepath, exif_dict)
+                return True
+        if not _patch_exif_in_place(filepath, exif_dict, EXIF_UPDATED_KEYS):
+            piexif.insert(piexif.dump(exif_dict), str(filepath))
         return True
     else:
-        local_dt_str = local_dt.strftime("%Y:%m:%d %H:%M:%S")
         LOGGER.info("[dry-run] Would update %s (lat=%.5f, lon=%.5f, tz=%s, time=%s)", filepath.name, tl_point.lat, tl_point.lon, offset_str, local_dt_str)
         return True
 
 
+def _link_or_copy(src: pathlib.Path, dst: pathlib.Path):
+    """Hardlink *src* to *dst*, copying instead where links are unsupported (exFAT, EXDEV)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _inode_is_replaceable(path: pathlib.Path) -> bool:
+    """Whether swapping a new file in for *path* keeps everything but its inode number.
+
+    :func:`_replace_exif` only carries the permission bits over, so symlinks
+    (which would be replaced rather than written through), files with other
+    hardlinks, another owner/group, or extended attributes (ACLs, macOS Finder
+    tags) must be rewritten in place. Platforms where xattrs cannot be listed
+    are treated as having some.
+    """
+    if path.is_symlink():
+        return False
+    st = os.stat(path)
+    if st.st_nlink > 1 or not hasattr(os, "listxattr"):
+        return False
+    if (st.st_uid, st.st_gid) != (os.geteuid(), os.getegid()):
+        return False
+    try:
+        # The SELinux label is assigned afresh to the new file anyway.
+        return not [name for name in os.listxattr(path) if name != "security.selinux"]
+    except OSError:
+        return False
+
+
+def _replace_exif(filepath: pathlib.Path, exif_dict):
+    """Write *exif_dict* into a new file and atomically swap it in for *filepath*."""
+    tmp_path = filepath.with_name(f".{filepath.name}.tmp")
+    try:
+        piexif.insert(piexif.dump(exif_dict), str(filepath), str(tmp_path))
+        shutil.copymode(filepath, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
 def _format_tz_offset(td: dt.timedelta) -> str:
     total_minutes = int(td.total_seconds() / 60)
     sign = "+" if total_minutes >= 0 else "-"
@@ -357,31 +751,143 @@ def _format_tz_offset(td: dt.timedelta) -> str:
     return f"{sign}{hh:02d}:{mm:02d}"
 
 
-def _write_gps(exif_dict, lat: float, lon: float):
-    def _deg_to_dms_rational(deg_float: float):
-        deg_abs = abs(deg_float)
-        deg = int(deg_abs)
-        minutes_float = (deg_abs - deg) * 60
-        minutes = int(minutes_float)
-        seconds = (minutes_float - minutes) * 60
-        return [
-            (deg, 1),
-            (minutes, 1),
-            (int(seconds * 100), 100),  # 2-decimal-place precision
-        ]
+def _dms_rationals(degrees: np.ndarray) -> np.ndarray:
+    """Split decimal degrees into integer ``(deg, min, sec * 100)`` along a new last axis."""
+    deg_abs = np.abs(degrees)
+    deg = deg_abs.astype(np.int64)
+    minutes_float = (deg_abs - deg) * 60
+    minutes = minutes_float.astype(np.int64)
+    seconds = (minutes_float - minutes) * 60
+    return np.stack((deg, minutes, (seconds * 100).astype(np.int64)), axis=-1)  # 2-decimal-place precision
+
+
+def _write_gps(exif_dict, lat: float, lon: float, dms: np.ndarray | None = None):
+    """Set GPS tags; *dms* is the precomputed ``_dms_rationals([lat, lon])`` if available."""
+    if dms is None:
+        dms = _dms_rationals(np.array([lat, lon], dtype=np.float64))
+
+    def _as_rational(row):
+        deg, minutes, seconds_x100 = row.tolist()
+        return [(deg, 1), (minutes, 1), (seconds_x100, 100)]
 
     gps_ifd = exif_dict.setdefault("GPS", {})
 
-    gps_ifd[piexif.GPSIFD.GPSLatitudeRef] = ("N" if lat >= 0 else "S").encode()
-    gps_ifd[piexif.GPSIFD.GPSLatitude] = _deg_to_dms_rational(lat)
-    gps_ifd[piexif.GPSIFD.GPSLongitudeRef] = ("E" if lon >= 0 else "W").encode()
-    gps_ifd[piexif.GPSIFD.GPSLongitude] = _deg_to_dms_rational(lon)
+    gps_ifd[piexif.GPSIFD.GPSLatitudeRef] = b"N" if lat >= 0 else b"S"
+    gps_ifd[piexif.GPSIFD.GPSLatitude] = _as_rational(dms[0])
+    gps_ifd[piexif.GPSIFD.GPSLongitudeRef] = b"E" if lon >= 0 else b"W"
+    gps_ifd[piexif.GPSIFD.GPSLongitude] = _as_rational(dms[1])
+
+
+# ---------------------------------------------------------------------------
+# In-place EXIF patching
+# ---------------------------------------------------------------------------
+
+TIFF_ASCII = 2
+TIFF_RATIONAL = 5
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+
+
+def _read_ifd_entries(tiff: bytes, pointer: int, endian: str) -> dict[int, tuple[int, int, int]]:
+    """Map tag -> (type, count, offset of the value within *tiff*) for one IFD."""
+    (entry_count,) = struct.unpack_from(endian + "H", tiff, pointer)
+    entries = {}
+    for i in range(entry_count):
+        entry = pointer + 2 + 12 * i
+        tag, value_type, count, value_pointer = struct.unpack_from(endian + "HHLL", tiff, entry)
+        size = TIFF_TYPE_SIZES.get(value_type, 1) * count
+        entries[tag] = (value_type, count, entry + 8 if size <= 4 else value_pointer)
+    return entries
+
+
+def _read_tiff_ifds(tiff: bytes) -> tuple[str, dict[str, dict[int, tuple[int, int, int]]]]:
+    """Index the 0th, Exif and GPS IFDs of a TIFF block by tag."""
+    if tiff[:2] not in (b"II", b"MM"):
+        raise ValueError("Not a TIFF header")
+    endian = "<" if tiff[:2] == b"II" else ">"
+    (ifd0_pointer,) = struct.unpack_from(endian + "L", tiff, 4)
+    ifds = {"0th": _read_ifd_entries(tiff, ifd0_pointer, endian)}
+    for ifd_name, pointer_tag in (("Exif", piexif.ImageIFD.ExifTag), ("GPS", piexif.ImageIFD.GPSTag)):
+        entry = ifds["0th"].get(pointer_tag)
+        if entry is None:
+            ifds[ifd_name] = {}
+            continue
+        (pointer,) = struct.unpack_from(endian + "L", tiff, entry[2])
+        ifds[ifd_name] = _read_ifd_entries(tiff, pointer, endian)
+    return endian, ifds
+
+
+def _encode_exif_value(value, entry: tuple[int, int, int] | None, endian: str) -> bytes | None:
+    """Encode *value* to overwrite *entry*, or ``None`` if it would not fit exactly."""
+    if entry is None:
+        return None
+    value_type, count, _ = entry
+    if isinstance(value, bytes):
+        if value_type != TIFF_ASCII or count != len(value) + 1:
+            return None
+        return value + b"\x00"
+    if value_type != TIFF_RATIONAL or count != len(value):
+        return None
+    return b"".join(struct.pack(endian + "LL", num, den) for num, den in value)
+
+
+def _patch_exif_in_place(filepath: pathlib.Path, exif_dict, keys) -> bool:
+    """Overwrite the values of *keys* directly inside the file's Exif segment.
+
+    Only succeeds when every tag already exists with the same type and size,
+    so nothing is re-serialised or moved. Returns ``False`` (file untouched)
+    otherwise, leaving the caller to fall back to ``piexif.insert``.
+    """
+    with open(filepath, "r+b") as f:
+        head = f.read(EXIF_HEADER_READ_BYTES)
+        segment = _locate_exif_segment(head)
+        if segment is None or segment[1] > len(head):
+            return False
+        tiff_start = segment[0] + 10
+        try:
+            endian, ifds = _read_tiff_ifds(head[tiff_start:segment[1]])
+        except (ValueError, struct.error):
+            return False
+
+        writes = []
+        for ifd_name, tag in keys:
+            entry = ifds.get(ifd_name, {}).get(tag)
+            payload = _encode_exif_value(exif_dict[ifd_name][tag], entry, endian)
+            if payload is None or tiff_start + entry[2] + len(payload) > segment[1]:
+                return False
+            writes.append((tiff_start + entry[2], payload))
+
+        for position, payload in writes:
+            f.seek(position)
+            f.write(payload)
+    return True
 
 
 # ---------------------------------------------------------------------------
 # CLI entry-point
 # ---------------------------------------------------------------------------
 
+# Photos submitted per worker at a time; a huge batch is fed to the pool
+# gradually instead of queuing one job (and its EXIF) per photo up front.
+JOBS_IN_FLIGHT_PER_WORKER = 2
+
+
+def _run_bounded(pool: concurrent.futures.Executor, tasks, limit: int):
+    """Run ``(key, fn)`` *tasks* on *pool*, yielding ``(key, future)`` as each finishes.
+
+    No more than *limit* tasks are ever submitted but unfinished; the *tasks*
+    iterable is only advanced once there is room.
+    """
+    pending = {}
+    for key, fn in tasks:
+        if len(pending) >= limit:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+        pending[pool.submit(fn)] = key
+    for future in concurrent.futures.as_completed(pending):
+        yield pending[future], future
+
+
 def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser(description="Stamp photos with location + local time from Google Timeline export.")
     parser.add_argument("--timeline", type=pathlib.Path, required=True, help="Path to Timeline.json")
@@ -391,14 +897,17 @@ def main(argv: list[str] | None = None):
     parser.add_argument("--apply", action="store_true", help="Actually write changes. Default is dry-run (no files modified).")
     parser.add_argument("--backup", action="store_true", help="Create .exif_backup before writing (with --apply).")
     parser.add_argument("--overwrite-gps", action="store_true", help="Update photo even if it already contains GPS tags.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of photos to rewrite concurrently (default: CPU count)")
     parser.add_argument("--verbose", action="store_true")
     args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
 
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s:%(message)s")
 
-    camera_tz = pytz.timezone(args.camera_tz)
-    points = load_timeline_points(args.timeline)
-    if not points:
+    camera_tz = ZoneInfo(args.camera_tz)
+    timeline = load_timeline_points(args.timeline)
+    if not len(timeline):
         LOGGER.error("No timeline points extracted – exiting.")
         sys.exit(1)
 
@@ -410,41 +919,110 @@ def main(argv: list[str] | None = None):
     processed = 0
     skipped = 0
     max_gap = dt.timedelta(minutes=args.max_gap_minutes)
+    max_gap_ns = max_gap // dt.timedelta(microseconds=1) * 1000
 
+    # First pass: resolve candidate capture instants so the whole batch can be
+    # matched against the timeline with a single searchsorted. Only the
+    # timestamp tags are read here; update_photo does the one full decode.
+    pending = []
     for photo in photo_paths:
         try:
-            exif_dict = piexif.load(str(photo))
-            try:
-                resolved = _resolve_photo_timestamp_utc(points, exif_dict, camera_tz, max_gap)
-            except MissingDateTimeOriginalError:
-                LOGGER.info("%s lacks DateTimeOriginal, skipping", photo.name)
-                skipped += 1
-                continue
-            except PhotoTimestampError as exc:
-                LOGGER.warning("%s %s; skipping", photo.name, exc)
-                skipped += 1
-                continue
-            if resolved is None:
-                LOGGER.info("%s has no close timeline match (gap > %s); skipping", photo.name, max_gap)
+            head = _read_file_head(photo)
+            if not args.overwrite_gps and _has_gps_fast(head):
+                LOGGER.debug("%s already has GPS tags; skipping", photo.name)
                 skipped += 1
                 continue
-            photo_dt_utc, tl_point = resolved
-            would_update = update_photo(
+            timestamp_tags = _load_timestamp_tags_fast(photo, head)
+            original_str = _datetime_original_text(timestamp_tags)
+            candidates = _photo_timestamp_candidates_utc(timestamp_tags, camera_tz)
+        except MissingDateTimeOriginalError:
+            LOGGER.info("%s lacks DateTimeOriginal, skipping", photo.name)
+            skipped += 1
+            continue
+        except PhotoTimestampError as exc:
+            LOGGER.warning("%s %s; skipping", photo.name, exc)
+            skipped += 1
+            continue
+        except Exception as exc:
+            LOGGER.warning("Failed to process %s: %s", photo.name, exc)
+            skipped += 1
+            continue
+        pending.append((photo, original_str, candidates))
+
+    candidate_ns = np.array(
+        [_datetime_to_ns(candidate) for _, _, candidates in pending for candidate in candidates],
+        dtype=np.int64,
+    )
+    matches = match_timeline(timeline, candidate_ns, max_gap_ns)
+    # Only matched points ever need a timezone; resolve them before the workers run.
+    _resolve_timezones(timeline, matches[matches >= 0])
+
+    jobs = []
+    # Hardlinks and symlinks can reach one file by several paths; concurrent
+    # rewrites of the same inode would interleave, so only the first is queued.
+    queued_files = set()
+    offset = 0
+    for photo, original_str, candidates in pending:
+        photo_matches = matches[offset:offset + len(candidates)]
+        offset += len(candidates)
+        try:
+            resolved = _resolve_photo_timestamp_utc(timeline, original_str, candidates, photo_matches)
+            st = os.stat(photo)
+        except PhotoTimestampError as exc:
+            LOGGER.warning("%s %s; skipping", photo.name, exc)
+            skipped += 1
+            continue
+        except Exception as exc:
+            LOGGER.warning("Failed to process %s: %s", photo.name, exc)
+            skipped += 1
+            continue
+        if resolved is None:
+            LOGGER.info("%s has no close timeline match (gap > %s); skipping", photo.name, max_gap)
+            skipped += 1
+            continue
+        if (st.st_dev, st.st_ino) in queued_files:
+            LOGGER.debug("%s is another path to an already queued photo; skipping", photo.name)
+            skipped += 1
+            continue
+        queued_files.add((st.st_dev, st.st_ino))
+        jobs.append((photo, resolved))
+
+    # Split every matched coordinate into degrees/minutes/seconds in one go.
+    gps_dms = _dms_rationals(
+        np.array([(tl_point.lat, tl_point.lon) for _, (_, tl_point) in jobs], dtype=np.float64).reshape(-1, 2)
+    )
+
+    # The EXIF rewrite is I/O bound, so threads overlap the disk work without
+    # pickling the timeline or re-initialising timezone data per process.
+    tasks = (
+        (
+            photo,
+            functools.partial(
+                update_photo,
                 photo,
                 tl_point,
                 camera_tz,
                 photo_dt_utc=photo_dt_utc,
+                gps_dms=photo_dms,
                 apply=args.apply,
                 backup=args.backup,
                 overwrite_gps=args.overwrite_gps,
-            )
+            ),
+        )
+        for (photo, (photo_dt_utc, tl_point)), photo_dms in zip(jobs, gps_dms)
+    )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for photo, future in _run_bounded(pool, tasks, args.workers * JOBS_IN_FLIGHT_PER_WORKER):
+            try:
+                would_update = future.result()
+            except Exception as exc:
+                LOGGER.warning("Failed to process %s: %s", photo.name, exc)
+                skipped += 1
+                continue
             if would_update:
                 processed += 1
             else:
                 skipped += 1
-        except Exception as exc:
-            LOGGER.warning("Failed to process %s: %s", photo.name, exc)
-            skipped += 1
 
     if args.apply:
         LOGGER.info("Done. %s photos updated, %s skipped.", processed, skipped)